@@ -0,0 +1,352 @@
+"""
+Offline benchmark suite for the Tabelog scraper.
+
+Runs the real TabelogScraper end to end against a local stub server and a
+temporary database, plus micro-benchmarks for TabelogParser and
+Database.insert_restaurant. Run from the repository root:
+
+    python -m benchmarks.run --pages 5 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from src.config.settings import scraper_config
+from src.core.database import Database
+from src.core.scraper import TabelogScraper
+from src.utils.parsing import TabelogParser
+from benchmarks.stub_server import StubTabelogServer
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+AREA = "tokyo"
+
+
+def _percentile(samples: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of the samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(percent * len(ordered) / 100) - 1)
+    return ordered[rank]
+
+
+def _latency_summary(samples_s: List[float]) -> Dict[str, Optional[float]]:
+    """Summarize latency samples (seconds) in milliseconds."""
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+    return {
+        "count": len(samples_s),
+        "mean_ms": ms(sum(samples_s) / len(samples_s)) if samples_s else None,
+        "p50_ms": ms(_percentile(samples_s, 50)),
+        "p95_ms": ms(_percentile(samples_s, 95)),
+        "p99_ms": ms(_percentile(samples_s, 99)),
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 2)
+
+
+def _timed(func: Callable, samples: List[float]) -> Callable:
+    """Wrap a sync function so each call's duration is appended to samples."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_async(func: Callable, samples: List[float]) -> Callable:
+    """Wrap a coroutine function so each call's duration is appended to samples."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _make_server(args) -> StubTabelogServer:
+    return StubTabelogServer(
+        pages=args.pages,
+        per_page=args.per_page,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+async def run_end_to_end(args, tmp_dir: str) -> Dict[str, Any]:
+    """Scrape the stub server with the real scraper and a temporary database."""
+    scraper_config.CONCURRENT_REQUESTS = args.concurrency
+    scraper_config.DELAY_BETWEEN_REQUESTS = args.request_delay
+    scraper_config.MIN_DELAY_BETWEEN_PAGES = args.page_delay
+    scraper_config.MAX_DELAY_BETWEEN_PAGES = args.page_delay
+
+    fetch_samples: List[float] = []
+    parse_samples: List[float] = []
+    insert_samples: List[float] = []
+
+    with _make_server(args) as server:
+        db = Database()
+        db.db_name = os.path.join(tmp_dir, "end_to_end.db")
+        await db.initialize()
+
+        scraper = TabelogScraper(db)
+        await scraper.initialize()
+        try:
+            client = scraper.http_client.client
+            client.get = _timed_async(client.get, fetch_samples)
+            scraper.parser.parse_restaurant_page = _timed(TabelogParser.parse_restaurant_page, parse_samples)
+            scraper.parser.extract_restaurant_urls = _timed(TabelogParser.extract_restaurant_urls, parse_samples)
+            db.insert_restaurant = _timed_async(db.insert_restaurant, insert_samples)
+
+            start = time.perf_counter()
+            await scraper.scrape_listing(server.listing_url(AREA), args.pages, AREA)
+            wall_s = time.perf_counter() - start
+            # ru_maxrss only grows, so read it before the micro-benchmarks run
+            peak_rss_mb = _peak_rss_mb()
+        finally:
+            await scraper.close()
+
+        await db.close()
+        rows = await db.get_restaurant_count()
+        status_counts = dict(sorted(server.status_counts.items()))
+
+    pages_ok = status_counts.get(200, 0)
+    return {
+        "wall_s": round(wall_s, 3),
+        "requests": sum(status_counts.values()),
+        "status_counts": {str(status): count for status, count in status_counts.items()},
+        "pages_per_sec": round(pages_ok / wall_s, 2) if wall_s else None,
+        "parse_ms_per_page": round(sum(parse_samples) / len(parse_samples) * 1000, 3) if parse_samples else None,
+        "db_rows": rows,
+        "db_rows_per_sec": round(rows / wall_s, 2) if wall_s else None,
+        "db_insert": _latency_summary(insert_samples),
+        "fetch_latency": _latency_summary(fetch_samples),
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_parser_micro(args) -> Dict[str, Any]:
+    """Time TabelogParser on fixture detail and listing pages."""
+    server = _make_server(args)
+    detail_html = [server.render_restaurant(AREA, restaurant_id) for restaurant_id in range(1, 21)]
+    listing_html = server.render_listing(AREA, 1)
+
+    detail_samples: List[float] = []
+    parse = _timed(TabelogParser.parse_restaurant_page, detail_samples)
+    for i in range(args.iterations):
+        parse(detail_html[i % len(detail_html)], server.restaurant_url(AREA, i), AREA)
+
+    listing_samples: List[float] = []
+    extract = _timed(TabelogParser.extract_restaurant_urls, listing_samples)
+    for _ in range(args.iterations):
+        extract(listing_html)
+
+    return {
+        "iterations": args.iterations,
+        "detail_page_bytes": len(detail_html[0].encode("utf-8")),
+        "parse_restaurant_page": _latency_summary(detail_samples),
+        "extract_restaurant_urls": _latency_summary(listing_samples),
+    }
+
+
+async def run_insert_micro(args, tmp_dir: str) -> Dict[str, Any]:
+    """Time sequential Database.insert_restaurant calls on a fresh database."""
+    server = _make_server(args)
+    db = Database()
+    db.db_name = os.path.join(tmp_dir, "insert_micro.db")
+    await db.initialize()
+
+    rows = []
+    for restaurant_id in range(1, args.iterations + 1):
+        url = server.restaurant_url(AREA, restaurant_id)
+        rows.append(TabelogParser.parse_restaurant_page(server.render_restaurant(AREA, restaurant_id), url, AREA))
+
+    samples: List[float] = []
+    insert = _timed_async(db.insert_restaurant, samples)
+    start = time.perf_counter()
+    for row in rows:
+        await insert(row)
+    elapsed = time.perf_counter() - start
+    await db.close()
+
+    return {
+        "rows": len(rows),
+        "rows_per_sec": round(len(rows) / elapsed, 2) if elapsed else None,
+        "insert_restaurant": _latency_summary(samples),
+    }
+
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "compare", "allow_config_mismatch", "skip_end_to_end", "skip_micro")
+            },
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if not args.skip_end_to_end:
+            logger.info(f"Running end-to-end benchmark: {args.pages} pages x {args.per_page} restaurants")
+            results["end_to_end"] = await run_end_to_end(args, tmp_dir)
+        if not args.skip_micro:
+            logger.info(f"Running micro-benchmarks: {args.iterations} iterations")
+            results["micro"] = {
+                "parser": run_parser_micro(args),
+                "database": await run_insert_micro(args, tmp_dir),
+                # Process peak so far, including the end-to-end run if it ran first
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+    return results
+
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested numeric results into dotted metric names."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def config_differences(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Describe benchmark options that differ between two runs."""
+    old = baseline.get("meta", {}).get("config", {})
+    new = current.get("meta", {}).get("config", {})
+    return [
+        f"{key}: {old.get(key)} -> {new.get(key)}"
+        for key in sorted(old.keys() | new.keys())
+        if old.get(key) != new.get(key)
+    ]
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Describe how each metric changed relative to a baseline run."""
+    old = _flatten({k: v for k, v in baseline.items() if k != "meta"})
+    new = _flatten({k: v for k, v in current.items() if k != "meta"})
+    lines = []
+    for name in sorted(old.keys() & new.keys()):
+        if old[name]:
+            change = f"{(new[name] - old[name]) / old[name] * 100:+.1f}%"
+        else:
+            change = "n/a"
+        lines.append(f"{name}: {old[name]} -> {new[name]} ({change})")
+    return lines
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Tabelog scraper")
+    parser.add_argument("--pages", type=int, default=5, help="Listing pages to scrape (default: 5)")
+    parser.add_argument("--per-page", type=int, default=20, help="Restaurants per listing page (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=scraper_config.CONCURRENT_REQUESTS,
+                        help="Concurrent requests (default: scraper setting)")
+    parser.add_argument("--request-delay", type=float, default=0.0,
+                        help="Delay before each request in seconds (default: 0)")
+    parser.add_argument("--page-delay", type=float, default=0.0,
+                        help="Delay between listing pages in seconds (default: 0)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub server latency per response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of responses returning 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of responses returning 429")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--iterations", type=int, default=200, help="Micro-benchmark iterations (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error injection")
+    parser.add_argument("--skip-end-to-end", action="store_true", help="Only run the micro-benchmarks")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the end-to-end benchmark")
+    parser.add_argument("--output", type=str, help="Write results as JSON to this file")
+    parser.add_argument("--compare", type=str, help="Baseline results JSON to compare against")
+    parser.add_argument("--allow-config-mismatch", action="store_true",
+                        help="Compare even if the baseline was run with different options")
+    parser.add_argument("--log-level", type=str, default="WARNING", help="Scraper log level (default: WARNING)")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_arguments()
+    # Progress messages from this module are shown regardless of the scraper log level
+    min_level = logger.level(args.log_level.upper()).no
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level="INFO",
+        filter=lambda record: record["name"] == __name__ or record["level"].no >= min_level
+    )
+
+    results = await run_benchmarks(args)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        logger.info(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        differences = config_differences(baseline, results)
+        if differences:
+            # Different latency, error injection or sizes change the numbers as much as a code change would
+            for line in differences:
+                logger.warning(f"Benchmark option differs from baseline: {line}")
+            if not args.allow_config_mismatch:
+                logger.error("Not comparing runs with different options; pass --allow-config-mismatch to compare anyway")
+                sys.exit(1)
+        print(f"\nCompared with {args.compare} ({baseline.get('meta', {}).get('git_revision')}):")
+        for line in compare_results(baseline, results):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
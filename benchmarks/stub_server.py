@@ -0,0 +1,254 @@
+"""
+Local stub Tabelog server serving fixture listing and detail pages.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional, Tuple
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+CITIES: List[Tuple[str, str]] = [
+    ("Ginza", "Chuo"),
+    ("Shibuya", "Shibuya"),
+    ("Shinjuku", "Shinjuku"),
+    ("Ebisu", "Shibuya"),
+    ("Asakusa", "Taito"),
+    ("Roppongi", "Minato"),
+]
+CATEGORIES: List[str] = ["Sushi", "Ramen", "Yakitori", "Tempura", "Izakaya", "Soba", "French", "Italian"]
+PRICE_RANGES: List[str] = [
+    "-",
+    "JPY 1,000～JPY 1,999",
+    "JPY 2,000～JPY 2,999",
+    "JPY 5,000～JPY 5,999",
+    "JPY 10,000～JPY 14,999",
+    "JPY 20,000～JPY 29,999",
+]
+
+
+def _load_template(name: str) -> Template:
+    return Template((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+
+
+class StubTabelogServer:
+    """Serve fixture pages with configurable latency, error injection and pagination.
+
+    Listing pages live at ``/en/<area>/`` and ``/en/<area>/rstLst/<page>/`` and
+    link to detail pages at ``/en/<area>/A1301/A130101/<id>/``. Detail pages are
+    rendered deterministically from the restaurant id.
+    """
+
+    def __init__(
+        self,
+        pages: int = 5,
+        per_page: int = 20,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 0,
+        reviews_per_page: int = 10,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.reviews_per_page = reviews_per_page
+        self.host = host
+        self.port = port
+
+        self.status_counts: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._listing_template = _load_template("listing.html")
+        self._listing_item_template = _load_template("listing_item.html")
+        self._restaurant_template = _load_template("restaurant.html")
+        self._review_template = _load_template("review.html")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/en"
+
+    def listing_url(self, area: str) -> str:
+        """Get the first listing page URL for an area."""
+        return f"{self.base_url}/{area}/"
+
+    def restaurant_url(self, area: str, restaurant_id: int) -> str:
+        """Get the detail page URL for a restaurant."""
+        return f"{self.base_url}/{area}/A1301/A130101/{restaurant_id}/"
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stop the server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubTabelogServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def restaurant_data(self, restaurant_id: int) -> Dict[str, str]:
+        """Get the deterministic field values used to render a restaurant page."""
+        city, ward = CITIES[restaurant_id % len(CITIES)]
+        categories = [
+            CATEGORIES[restaurant_id % len(CATEGORIES)],
+            CATEGORIES[(restaurant_id // len(CATEGORIES) + 1) % len(CATEGORIES)],
+        ]
+        return {
+            "name": f"Restaurant {restaurant_id}",
+            "name_jp": f"レストラン{restaurant_id}",
+            "rating": f"{3.0 + (restaurant_id * 37 % 150) / 100:.2f}",
+            "review_count": str(restaurant_id * 13 % 900 + 5),
+            "city": city,
+            "ward": ward,
+            "category": categories[0],
+            "categories": ", ".join(dict.fromkeys(categories)),
+            "price_lunch": PRICE_RANGES[restaurant_id % len(PRICE_RANGES)],
+            "price_dinner": PRICE_RANGES[(restaurant_id * 7 + 3) % len(PRICE_RANGES)],
+        }
+
+    def render_listing(self, area: str, page: int) -> str:
+        """Render a listing page; pages past the configured count have no restaurants."""
+        items = []
+        if 1 <= page <= self.pages:
+            first_id = (page - 1) * self.per_page + 1
+            for restaurant_id in range(first_id, first_id + self.per_page):
+                data = self.restaurant_data(restaurant_id)
+                items.append(self._listing_item_template.substitute(
+                    data, url=self.restaurant_url(area, restaurant_id)
+                ))
+        pagination = "\n".join(
+            f'    <a class="c-pagination__num" href="{self.base_url}/{area}/rstLst/{n}/">{n}</a>'
+            for n in range(1, self.pages + 1)
+        )
+        return self._listing_template.substitute(
+            area=area, page=page, restaurants="\n".join(items), pagination=pagination
+        )
+
+    def render_restaurant(self, area: str, restaurant_id: int) -> str:
+        """Render a restaurant detail page."""
+        data = self.restaurant_data(restaurant_id)
+        url = self.restaurant_url(area, restaurant_id)
+        address = f"{restaurant_id % 9 + 1}-{restaurant_id % 20 + 1}-{restaurant_id % 30 + 1} {data['city']}"
+        json_ld = json.dumps({
+            "@context": "http://schema.org",
+            "@type": "Restaurant",
+            "name": data["name"],
+            "url": url,
+            "address": {
+                "@type": "PostalAddress",
+                "streetAddress": address,
+                "addressLocality": f"{data['city']} {data['ward']}-ku",
+                "addressRegion": area.capitalize(),
+                "postalCode": f"{100 + restaurant_id % 900:03d}-{restaurant_id % 10000:04d}",
+                "addressCountry": "JP",
+            },
+            "geo": {
+                "@type": "GeoCoordinates",
+                "latitude": 35.6 + (restaurant_id % 100) / 1000,
+                "longitude": 139.7 + (restaurant_id % 100) / 1000,
+            },
+            "servesCuisine": data["categories"],
+            "aggregateRating": {
+                "@type": "AggregateRating",
+                "ratingValue": data["rating"],
+                "ratingCount": data["review_count"],
+            },
+        }, ensure_ascii=False)
+        reviews = "\n".join(
+            self._review_template.substitute(data, index=index)
+            for index in range(1, self.reviews_per_page + 1)
+        )
+        return self._restaurant_template.substitute(
+            data, url=url, address=address, json_ld=json_ld, reviews=reviews
+        )
+
+    def _route(self, path: str) -> Tuple[int, Optional[str]]:
+        """Map a request path to a status code and page body."""
+        path = re.sub(r"/+", "/", path.split("?", 1)[0])
+        match = re.fullmatch(r"/en/(\w+)/(?:rstLst/(\d+)/)?", path)
+        if match:
+            return 200, self.render_listing(match.group(1), int(match.group(2) or 1))
+        match = re.fullmatch(r"/en/(\w+)/\w+/\w+/(\d+)/", path)
+        if match:
+            return 200, self.render_restaurant(match.group(1), int(match.group(2)))
+        return 404, None
+
+    def _inject(self) -> Tuple[float, Optional[int]]:
+        """Pick the simulated latency and an optional injected error status."""
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                return delay, 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                return delay, self._random.choice([500, 502, 503, 504])
+            return delay, None
+
+    def _record(self, status: int):
+        with self._lock:
+            self.status_counts[status] += 1
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                delay, injected_status = stub._inject()
+                if delay:
+                    time.sleep(delay)
+
+                if injected_status:
+                    status, body = injected_status, None
+                else:
+                    status, body = stub._route(self.path)
+                payload = (body or "").encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                if status == 429:
+                    self.send_header("Retry-After", str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+                stub._record(status)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
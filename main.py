@@ -5,48 +5,121 @@ import sys
 from typing import Optional
 from src.core.database import Database
 from src.core.scraper import TabelogScraper
-from src.config import CITY_URLS, URL_PATTERNS, scraper_config
+from src.config import CITY_URLS, URL_PATTERNS, scraper_config, metrics_config
+from src.utils.metrics import MetricsExporter, metrics
+from src.utils.profiling import profiler
 
-def setup_logger():
+def setup_logger(level: str = "INFO"):
     """Configure logging settings."""
     logger.remove()
     logger.add(
         sys.stdout,
+        level=level,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{message}</cyan>"
     )
+    # File writes happen on loguru's background thread instead of blocking the event loop
     logger.add(
         "scraper.log",
+        level=level,
         rotation="500 MB",
         retention="10 days",
+        enqueue=True,
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}"
     )
 
+def log_metrics_summary():
+    """Log the final metrics and profiler results."""
+    summary = metrics.registry.summary_lines()
+    if summary:
+        logger.info("Metrics summary:")
+        for line in summary:
+            logger.info(f"  {line}")
+
+    if metrics_config.PROFILE_OUTPUT:
+        profiler.stop()
+        if profiler.samples:
+            profiler.write(metrics_config.PROFILE_OUTPUT)
+            logger.info("Hottest lines while scraping restaurants:")
+            for line in profiler.top_functions():
+                logger.info(f"  {line}")
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Tabelog Restaurant Data Scraper")
     
-    # Create a mutually exclusive group for search type
-    search_type = parser.add_mutually_exclusive_group(required=True)
-    search_type.add_argument(
+    # Create a mutually exclusive group for the action: a search type to scrape or a statistics command
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument(
         "--city",
         type=str,
         choices=list(CITY_URLS.keys()),
         help="City to scrape restaurants from"
     )
-    search_type.add_argument(
+    action.add_argument(
         "--food",
         "-f",
         type=str,
         help="Food type to search for (e.g., pizza, sushi, ramen)"
     )
+    action.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="Rebuild the area/city/category statistics tables from scratch"
+    )
+    action.add_argument(
+        "--verify-stats",
+        action="store_true",
+        help="Check the area/city/category statistics tables against the restaurants table"
+    )
     
     parser.add_argument(
         "--pages",
         type=int,
-        default=1,
         help="Number of pages to scrape (default: 1)"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--log-level",
+        type=str.upper,
+        default="INFO",
+        choices=["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"],
+        help="Minimum log level (default: INFO)"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Periodically write Prometheus metrics to this file"
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=metrics_config.EXPORT_INTERVAL,
+        help=f"Seconds between metrics file writes (default: {metrics_config.EXPORT_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics at http://127.0.0.1:<port>/metrics"
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Sample restaurant scraping and write folded stacks to this file"
+    )
+    args = parser.parse_args()
+
+    if args.rebuild_stats or args.verify_stats:
+        scrape_only = {
+            "--pages": args.pages,
+            "--metrics-file": args.metrics_file,
+            "--metrics-port": args.metrics_port,
+            "--profile": args.profile,
+        }
+        for option, value in scrape_only.items():
+            if value is not None:
+                parser.error(f"{option} only applies when scraping with --city or --food")
+    elif args.pages is None:
+        args.pages = 1
+    return args
 
 def get_search_url(args) -> str:
     """Generate the appropriate search URL based on arguments."""
@@ -67,18 +140,49 @@ def get_search_url(args) -> str:
 
 async def main():
     """Main execution function."""
-    # Setup logging
-    setup_logger()
-    
     # Parse command line arguments
     args = parse_arguments()
+
+    # Setup logging
+    setup_logger(args.log_level)
+
+    metrics_config.TEXTFILE_PATH = args.metrics_file or metrics_config.TEXTFILE_PATH
+    metrics_config.EXPORT_INTERVAL = args.metrics_interval
+    if args.metrics_port is not None:
+        metrics_config.HTTP_PORT = args.metrics_port
+    metrics_config.PROFILE_OUTPUT = args.profile or metrics_config.PROFILE_OUTPUT
+
+    exporter = MetricsExporter(
+        metrics.registry,
+        textfile_path=metrics_config.TEXTFILE_PATH,
+        interval=metrics_config.EXPORT_INTERVAL,
+        http_host=metrics_config.HTTP_HOST,
+        http_port=metrics_config.HTTP_PORT
+    )
     
     try:
         # Initialize database
         db = Database()
-        await db.initialize()
+        # Only the scrape path backfills the statistics, so --verify-stats sees them as stored
+        await db.initialize(backfill_stats=bool(args.city or args.food))
         logger.info("Database initialized successfully")
+
+        if args.rebuild_stats:
+            await db.rebuild_stats()
+            return
+        if args.verify_stats:
+            mismatches = await db.verify_stats()
+            for mismatch in mismatches:
+                logger.error(f"Statistics mismatch: {mismatch}")
+            if mismatches:
+                sys.exit(1)
+            logger.info("Statistics tables are consistent")
+            return
         
+        await exporter.start()
+        if metrics_config.PROFILE_OUTPUT:
+            profiler.start(metrics_config.PROFILE_INTERVAL)
+
         # Initialize scraper
         scraper = TabelogScraper(db)
         await scraper.initialize()
@@ -104,6 +208,11 @@ async def main():
         if 'scraper' in locals():
             await scraper.close()
         logger.info("Scraper closed")
+        if 'db' in locals():
+            await db.close()
+        await exporter.stop()
+        log_metrics_summary()
+        await logger.complete()
 
 if __name__ == "__main__":
     try:
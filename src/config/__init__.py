@@ -2,6 +2,6 @@
 Configuration settings for the Tabelog scraper.
 """
 
-from .settings import CITY_URLS, URL_PATTERNS, scraper_config, db_config
+from .settings import CITY_URLS, URL_PATTERNS, scraper_config, db_config, metrics_config
 
-__all__ = ['CITY_URLS', 'URL_PATTERNS', 'scraper_config', 'db_config'] 
\ No newline at end of file
+__all__ = ['CITY_URLS', 'URL_PATTERNS', 'scraper_config', 'db_config', 'metrics_config'] 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 @dataclass
 class ScraperConfig:
@@ -8,6 +8,8 @@ class ScraperConfig:
     REQUEST_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
     DELAY_BETWEEN_REQUESTS: float = 1.0  # seconds
+    MIN_DELAY_BETWEEN_PAGES: float = 1.0  # seconds
+    MAX_DELAY_BETWEEN_PAGES: float = 2.0  # seconds
     MAX_RESTAURANTS_PER_MINUTE: int = 100
 
     # Headers to mimic browser behavior
@@ -26,6 +28,14 @@ class DatabaseConfig:
     DB_NAME: str = "tabelog_restaurants.db"
     TABLES: Dict[str, str] = None
 
+    # Aggregate statistics maintained alongside the restaurants table
+    STATS_GROUP_TYPES: Tuple[str, ...] = ("area", "city", "category")
+    RATING_BUCKET_WIDTH: float = 0.1
+
+    # Error rows are buffered and written in batches
+    ERROR_LOG_BATCH_SIZE: int = 100
+    ERROR_LOG_FLUSH_INTERVAL: float = 5.0  # seconds
+
     def __post_init__(self):
         self.TABLES = {
             "restaurants": """
@@ -70,9 +80,38 @@ class DatabaseConfig:
                     url TEXT,
                     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
+            """,
+            "group_stats": """
+                CREATE TABLE IF NOT EXISTS group_stats (
+                    group_type TEXT NOT NULL,
+                    group_key TEXT NOT NULL,
+                    restaurant_count INTEGER NOT NULL DEFAULT 0,
+                    rated_count INTEGER NOT NULL DEFAULT 0,
+                    rating_sum REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (group_type, group_key)
+                )
+            """,
+            "group_stat_buckets": """
+                CREATE TABLE IF NOT EXISTS group_stat_buckets (
+                    group_type TEXT NOT NULL,
+                    group_key TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (group_type, group_key, metric, bucket)
+                )
             """
         }
 
+@dataclass
+class MetricsConfig:
+    TEXTFILE_PATH: Optional[str] = None  # Prometheus text file, rewritten periodically
+    EXPORT_INTERVAL: float = 15.0  # seconds
+    HTTP_HOST: str = "127.0.0.1"
+    HTTP_PORT: Optional[int] = None  # Serve /metrics on this port when set
+    PROFILE_OUTPUT: Optional[str] = None  # Folded stacks from the sampling profiler
+    PROFILE_INTERVAL: float = 0.005  # seconds
+
 # Cities and their corresponding Tabelog URLs
 CITY_URLS: Dict[str, str] = {
     "tokyo": "/tokyo/",
@@ -90,4 +129,5 @@ URL_PATTERNS: Dict[str, str] = {
 
 # Create instances of configs
 scraper_config = ScraperConfig()
-db_config = DatabaseConfig() 
\ No newline at end of file
+db_config = DatabaseConfig()
+metrics_config = MetricsConfig() 
\ No newline at end of file
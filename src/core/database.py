@@ -1,16 +1,33 @@
 import aiosqlite
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+import asyncio
+import math
+import re
+import time
+from typing import Dict, List, Optional, Any, Tuple
+from datetime import datetime, timezone
 from loguru import logger
 from src.config.settings import db_config
+from src.utils.metrics import metrics
 
 class Database:
     def __init__(self):
         self.db_name = db_config.DB_NAME
         self.tables = db_config.TABLES
+        self.stats_group_types = db_config.STATS_GROUP_TYPES
+        self.rating_bucket_width = db_config.RATING_BUCKET_WIDTH
+        self.error_log_batch_size = db_config.ERROR_LOG_BATCH_SIZE
+        self.error_log_flush_interval = db_config.ERROR_LOG_FLUSH_INTERVAL
+        self._error_buffer: List[Tuple[str, str, Optional[str], str]] = []
+        self._error_flush_requested: Optional[asyncio.Event] = None
+        self._error_flush_task: Optional[asyncio.Task] = None
+        self._error_flush_lock: Optional[asyncio.Lock] = None
 
-    async def initialize(self):
-        """Initialize the database and create tables if they don't exist."""
+    async def initialize(self, backfill_stats: bool = True):
+        """Initialize the database and create tables if they don't exist.
+
+        With backfill_stats, empty aggregate tables are rebuilt when restaurants
+        already exist (e.g. for databases created before the tables were added).
+        """
         async with aiosqlite.connect(self.db_name) as db:
             for table_name, create_table_sql in self.tables.items():
                 try:
@@ -20,6 +37,16 @@ class Database:
                     logger.error(f"Error creating table {table_name}: {str(e)}")
                     raise
 
+            if not backfill_stats:
+                return
+            async with db.execute("SELECT EXISTS(SELECT 1 FROM group_stats)") as cursor:
+                has_stats = (await cursor.fetchone())[0]
+            async with db.execute("SELECT EXISTS(SELECT 1 FROM restaurants)") as cursor:
+                has_restaurants = (await cursor.fetchone())[0]
+        if has_restaurants and not has_stats:
+            logger.info("Aggregate statistics are empty, rebuilding from restaurants")
+            await self.rebuild_stats()
+
     async def insert_restaurant(self, restaurant_data: Dict[str, Any]) -> bool:
         """Insert a restaurant record and its categories into the database."""
         try:
@@ -50,13 +77,18 @@ class Database:
                     restaurant_data.get('area')
                 )
                 
-                logger.debug(f"Inserting restaurant with location data: city={values[5]}, region={values[6]}, lat={values[7]}, long={values[8]}")
+                logger.debug(
+                    "Inserting restaurant with location data: city={}, region={}, lat={}, long={}",
+                    values[5], values[6], values[7], values[8]
+                )
                 
+                write_start = time.perf_counter()
                 cursor = await db.execute(sql, values)
                 restaurant_id = cursor.lastrowid
 
                 # Insert categories
                 categories = restaurant_data.get('categories', [])
+                linked_categories = []
                 for category in categories:
                     category_id = await self._get_or_create_category(db, category)
                     if category_id:
@@ -64,17 +96,27 @@ class Database:
                             "INSERT INTO restaurant_categories (restaurant_id, category_id) VALUES (?, ?)",
                             (restaurant_id, category_id)
                         )
+                        linked_categories.append(category)
 
-                await db.commit()
+                # Update aggregates in the same transaction as the insert
+                await self._update_stats(db, restaurant_data, linked_categories)
+                metrics.db_write_seconds.observe(time.perf_counter() - write_start)
+
+                with metrics.db_commit_seconds.time():
+                    await db.commit()
+                metrics.db_inserts.labels("ok").inc()
                 return True
         except aiosqlite.IntegrityError as e:
             if "UNIQUE constraint failed: restaurants.url" in str(e):
                 logger.warning(f"Duplicate restaurant URL: {restaurant_data.get('url')}")
+                metrics.db_inserts.labels("duplicate").inc()
             else:
                 logger.error(f"Database integrity error: {str(e)}")
+                metrics.db_inserts.labels("error").inc()
             return False
         except Exception as e:
             logger.error(f"Error inserting restaurant: {str(e)}")
+            metrics.db_inserts.labels("error").inc()
             return False
 
     async def _get_or_create_category(self, db: aiosqlite.Connection, category_name: str) -> Optional[int]:
@@ -91,15 +133,267 @@ class Database:
             logger.error(f"Error getting/creating category {category_name}: {str(e)}")
             return None
 
-    async def log_error(self, error_type: str, error_message: str, url: Optional[str] = None):
-        """Log an error to the database."""
-        sql = "INSERT INTO error_logs (error_type, error_message, url) VALUES (?, ?, ?)"
+    def _rating_bucket(self, rating: float) -> str:
+        """Get the histogram bucket label for a rating."""
+        width = self.rating_bucket_width
+        # Round before flooring so that e.g. 3.6 does not land in the 3.5 bucket
+        return f"{math.floor(round(rating / width, 6)) * width:.2f}"
+
+    @staticmethod
+    def _bucket_sort_key(bucket: str) -> Tuple[int, float, str]:
+        """Order buckets by their numeric lower bound, e.g. 1000 for "JPY 1,000～JPY 1,999"."""
+        match = re.search(r'\d[\d,]*(?:\.\d+)?', bucket)
+        if match:
+            return 0, float(match.group().replace(',', '')), bucket
+        return 1, 0.0, bucket
+
+    def _stats_groups(self, restaurant_data: Dict[str, Any], categories: List[str]) -> List[Tuple[str, str]]:
+        """Get the (group_type, group_key) pairs a restaurant contributes to."""
+        groups = []
+        for group_type in ('area', 'city'):
+            if restaurant_data.get(group_type):
+                groups.append((group_type, restaurant_data[group_type]))
+        for category in dict.fromkeys(categories):
+            if category:
+                groups.append(('category', category))
+        return [group for group in groups if group[0] in self.stats_group_types]
+
+    def _stats_buckets(self, restaurant_data: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Get the (metric, bucket) pairs a restaurant contributes to."""
+        buckets = []
+        if restaurant_data.get('rating') is not None:
+            buckets.append(('rating', self._rating_bucket(restaurant_data['rating'])))
+        for metric in ('price_lunch', 'price_dinner'):
+            if restaurant_data.get(metric):
+                buckets.append((metric, restaurant_data[metric]))
+        return buckets
+
+    async def _update_stats(self, db: aiosqlite.Connection, restaurant_data: Dict[str, Any], categories: List[str]):
+        """Add a restaurant to the aggregate tables using the caller's transaction."""
+        groups = self._stats_groups(restaurant_data, categories)
+        if not groups:
+            return
+
+        rating = restaurant_data.get('rating')
+        rated = 1 if rating is not None else 0
+        await db.executemany(
+            """
+                INSERT INTO group_stats (group_type, group_key, restaurant_count, rated_count, rating_sum)
+                VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (group_type, group_key) DO UPDATE SET
+                    restaurant_count = restaurant_count + 1,
+                    rated_count = rated_count + excluded.rated_count,
+                    rating_sum = rating_sum + excluded.rating_sum
+            """,
+            [(group_type, group_key, rated, rating or 0.0) for group_type, group_key in groups]
+        )
+
+        buckets = self._stats_buckets(restaurant_data)
+        if buckets:
+            await db.executemany(
+                """
+                    INSERT INTO group_stat_buckets (group_type, group_key, metric, bucket, count)
+                    VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT (group_type, group_key, metric, bucket) DO UPDATE SET
+                        count = count + 1
+                """,
+                [
+                    (group_type, group_key, metric, bucket)
+                    for group_type, group_key in groups
+                    for metric, bucket in buckets
+                ]
+            )
+
+    async def _compute_stats(self, db: aiosqlite.Connection) -> Tuple[Dict[Tuple[str, str], List[float]], Dict[Tuple[str, str, str, str], int]]:
+        """Compute the aggregates from scratch by scanning the base tables."""
+        categories_by_restaurant: Dict[int, List[str]] = {}
+        async with db.execute("""
+            SELECT rc.restaurant_id, c.name
+            FROM restaurant_categories rc
+            JOIN categories c ON rc.category_id = c.id
+        """) as cursor:
+            async for restaurant_id, name in cursor:
+                categories_by_restaurant.setdefault(restaurant_id, []).append(name)
+
+        groups: Dict[Tuple[str, str], List[float]] = {}
+        buckets: Dict[Tuple[str, str, str, str], int] = {}
+        async with db.execute(
+            "SELECT id, area, city, rating, price_lunch, price_dinner FROM restaurants"
+        ) as cursor:
+            async for row in cursor:
+                restaurant_data = {
+                    'area': row[1],
+                    'city': row[2],
+                    'rating': row[3],
+                    'price_lunch': row[4],
+                    'price_dinner': row[5]
+                }
+                rating = restaurant_data['rating']
+                row_buckets = self._stats_buckets(restaurant_data)
+                for group in self._stats_groups(restaurant_data, categories_by_restaurant.get(row[0], [])):
+                    totals = groups.setdefault(group, [0, 0, 0.0])
+                    totals[0] += 1
+                    if rating is not None:
+                        totals[1] += 1
+                        totals[2] += rating
+                    for metric, bucket in row_buckets:
+                        key = (*group, metric, bucket)
+                        buckets[key] = buckets.get(key, 0) + 1
+        return groups, buckets
+
+    async def rebuild_stats(self) -> int:
+        """Rebuild the aggregate tables from the base tables. Returns the number of groups."""
+        async with aiosqlite.connect(self.db_name) as db:
+            # Take the write lock before scanning so no insert can commit between the scan and the rewrite
+            await db.execute("BEGIN IMMEDIATE")
+            groups, buckets = await self._compute_stats(db)
+            await db.execute("DELETE FROM group_stats")
+            await db.execute("DELETE FROM group_stat_buckets")
+            await db.executemany(
+                "INSERT INTO group_stats (group_type, group_key, restaurant_count, rated_count, rating_sum) VALUES (?, ?, ?, ?, ?)",
+                [(*group, *totals) for group, totals in groups.items()]
+            )
+            await db.executemany(
+                "INSERT INTO group_stat_buckets (group_type, group_key, metric, bucket, count) VALUES (?, ?, ?, ?, ?)",
+                [(*key, count) for key, count in buckets.items()]
+            )
+            await db.commit()
+        logger.info(f"Rebuilt aggregate statistics for {len(groups)} groups")
+        return len(groups)
+
+    async def verify_stats(self) -> List[str]:
+        """Compare the aggregate tables against the base tables. Returns a list of mismatches."""
+        async with aiosqlite.connect(self.db_name) as db:
+            # Read everything in one transaction so a concurrent insert can't land between the reads
+            await db.execute("BEGIN")
+            try:
+                expected_groups, expected_buckets = await self._compute_stats(db)
+                async with db.execute(
+                    "SELECT group_type, group_key, restaurant_count, rated_count, rating_sum FROM group_stats"
+                ) as cursor:
+                    stored_groups = {(row[0], row[1]): list(row[2:]) for row in await cursor.fetchall()}
+                async with db.execute(
+                    "SELECT group_type, group_key, metric, bucket, count FROM group_stat_buckets"
+                ) as cursor:
+                    stored_buckets = {tuple(row[:4]): row[4] for row in await cursor.fetchall()}
+            finally:
+                await db.rollback()
+
+        mismatches = []
+        for group in sorted(expected_groups.keys() | stored_groups.keys()):
+            expected = expected_groups.get(group, [0, 0, 0.0])
+            stored = stored_groups.get(group, [0, 0, 0.0])
+            if expected[:2] != stored[:2] or not math.isclose(expected[2], stored[2], abs_tol=1e-6):
+                mismatches.append(f"{group[0]}={group[1]}: expected {expected}, stored {stored}")
+        for key in sorted(expected_buckets.keys() | stored_buckets.keys()):
+            expected = expected_buckets.get(key, 0)
+            stored = stored_buckets.get(key, 0)
+            if expected != stored:
+                mismatches.append(f"{key[0]}={key[1]} {key[2]}[{key[3]}]: expected {expected}, stored {stored}")
+        return mismatches
+
+    async def get_group_stats(self, group_type: str, group_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get aggregate statistics for every group of a type, or for a single group."""
+        if group_type not in self.stats_group_types:
+            raise ValueError(f"Unknown group type: {group_type}")
+
+        where = "WHERE group_type = ?"
+        params: Tuple[str, ...] = (group_type,)
+        if group_key is not None:
+            where += " AND group_key = ?"
+            params += (group_key,)
+
         try:
             async with aiosqlite.connect(self.db_name) as db:
-                await db.execute(sql, (error_type, error_message, url))
-                await db.commit()
+                db.row_factory = aiosqlite.Row
+                async with db.execute(f"""
+                    SELECT group_key, restaurant_count, rated_count, rating_sum
+                    FROM group_stats {where}
+                    ORDER BY restaurant_count DESC, group_key
+                """, params) as cursor:
+                    stats = {}
+                    for row in await cursor.fetchall():
+                        stats[row['group_key']] = {
+                            'group_type': group_type,
+                            'group_key': row['group_key'],
+                            'restaurant_count': row['restaurant_count'],
+                            'rated_count': row['rated_count'],
+                            'mean_rating': row['rating_sum'] / row['rated_count'] if row['rated_count'] else None,
+                            'rating_histogram': {},
+                            'price_lunch': {},
+                            'price_dinner': {}
+                        }
+                async with db.execute(f"""
+                    SELECT group_key, metric, bucket, count
+                    FROM group_stat_buckets {where}
+                """, params) as cursor:
+                    rows = await cursor.fetchall()
+                    for row in sorted(rows, key=lambda row: self._bucket_sort_key(row['bucket'])):
+                        group = stats.get(row['group_key'])
+                        if group:
+                            metric = 'rating_histogram' if row['metric'] == 'rating' else row['metric']
+                            group[metric][row['bucket']] = row['count']
+                return list(stats.values())
         except Exception as e:
-            logger.error(f"Error logging to database: {str(e)}")
+            logger.error(f"Error getting {group_type} stats: {str(e)}")
+            return []
+
+    async def log_error(self, error_type: str, error_message: str, url: Optional[str] = None):
+        """Buffer an error for the error_logs table.
+
+        Rows are written in one transaction per batch, either every
+        ERROR_LOG_FLUSH_INTERVAL seconds or as soon as ERROR_LOG_BATCH_SIZE
+        rows are waiting. Call close() to write any remaining rows.
+        """
+        # Record the time of the error rather than of the flush (same format as CURRENT_TIMESTAMP)
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self._error_buffer.append((error_type, error_message, url, timestamp))
+
+        if self._error_flush_task is None:
+            self._error_flush_requested = asyncio.Event()
+            self._error_flush_lock = asyncio.Lock()
+            self._error_flush_task = asyncio.create_task(self._flush_errors_periodically())
+        if len(self._error_buffer) >= self.error_log_batch_size:
+            self._error_flush_requested.set()
+
+    async def _flush_errors_periodically(self):
+        """Flush buffered errors on a timer or when the batch size is reached."""
+        while True:
+            try:
+                await asyncio.wait_for(self._error_flush_requested.wait(), self.error_log_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._error_flush_requested.clear()
+            await self.flush_errors()
+
+    async def flush_errors(self):
+        """Write all buffered errors to the database in a single transaction."""
+        if not self._error_buffer:
+            return
+        async with self._error_flush_lock:
+            batch, self._error_buffer = self._error_buffer, []
+            if not batch:
+                return
+            sql = "INSERT INTO error_logs (error_type, error_message, url, timestamp) VALUES (?, ?, ?, ?)"
+            try:
+                async with aiosqlite.connect(self.db_name) as db:
+                    await db.executemany(sql, batch)
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error logging {len(batch)} errors to database: {str(e)}")
+
+    async def close(self):
+        """Stop the error flush timer and write any buffered errors."""
+        if self._error_flush_task:
+            # Cancel under the lock so an in-progress batch is never interrupted
+            async with self._error_flush_lock:
+                self._error_flush_task.cancel()
+            try:
+                await self._error_flush_task
+            except asyncio.CancelledError:
+                pass
+            self._error_flush_task = None
+        await self.flush_errors()
 
     async def get_restaurant_count(self) -> int:
         """Get the total number of restaurants in the database."""
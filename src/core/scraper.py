@@ -6,6 +6,8 @@ from src.config.settings import CITY_URLS, scraper_config
 from src.utils.http import HttpClient
 from src.utils.parsing import TabelogParser
 from src.core.database import Database
+from src.utils.metrics import metrics
+from src.utils.profiling import profiler
 
 class TabelogScraper:
     def __init__(self, db: Database):
@@ -30,39 +32,49 @@ class TabelogScraper:
         if not html:
             return []
 
-        urls = self.parser.extract_restaurant_urls(html)
+        with metrics.parse_seconds.labels("listing").time():
+            urls = self.parser.extract_restaurant_urls(html)
         if not urls:
             await self.db.log_error("URL_EXTRACTION_ERROR", f"No URLs found on page {page}", url)
         return urls
 
+    @profiler.profile
     async def _scrape_restaurant(self, url: str, search_term: str) -> bool:
         """Scrape a single restaurant."""
-        html = await self.http_client.get(url)
-        if not html:
-            return False
+        try:
+            html = await self.http_client.get(url)
+            if not html:
+                return False
 
-        # Extract area from URL (e.g., "tokyo" from "/tokyo/...")
-        url_parts = url.split('/')
-        area = None
-        for city in CITY_URLS:
-            if city in url_parts:
-                area = city
-                break
+            # Extract area from URL (e.g., "tokyo" from "/tokyo/...")
+            url_parts = url.split('/')
+            area = None
+            for city in CITY_URLS:
+                if city in url_parts:
+                    area = city
+                    break
         
-        if not area:
-            # If no city found in URL, use the region from JSON-LD as area
-            restaurant_data = self.parser.parse_restaurant_page(html, url, None)
-            if restaurant_data and restaurant_data.get('region'):
-                area = restaurant_data['region'].lower()
-            else:
-                area = 'unknown'
+            if not area:
+                # If no city found in URL, use the region from JSON-LD as area
+                with metrics.parse_seconds.labels("detail").time():
+                    restaurant_data = self.parser.parse_restaurant_page(html, url, None)
+                if restaurant_data and restaurant_data.get('region'):
+                    area = restaurant_data['region'].lower()
+                else:
+                    area = 'unknown'
         
-        # Now parse with the correct area
-        restaurant_data = self.parser.parse_restaurant_page(html, url, area)
-        if restaurant_data:
-            logger.debug(f"Storing restaurant with area: {area}, city: {restaurant_data.get('city')}, region: {restaurant_data.get('region')}")
-            return await self.db.insert_restaurant(restaurant_data)
-        return False
+            # Now parse with the correct area
+            with metrics.parse_seconds.labels("detail").time():
+                restaurant_data = self.parser.parse_restaurant_page(html, url, area)
+            if restaurant_data:
+                logger.debug(
+                    "Storing restaurant with area: {}, city: {}, region: {}",
+                    area, restaurant_data.get('city'), restaurant_data.get('region')
+                )
+                return await self.db.insert_restaurant(restaurant_data)
+            return False
+        finally:
+            metrics.restaurants_pending.dec()
 
     async def scrape_listing(self, base_url: str, pages: int, search_term: str):
         """Scrape restaurants from a listing page."""
@@ -77,9 +89,13 @@ class TabelogScraper:
                     tasks.append(self._scrape_restaurant(url, search_term))
                 
             if tasks:
+                metrics.restaurants_pending.inc(len(tasks))
                 results = await asyncio.gather(*tasks, return_exceptions=True)
                 successful = len([r for r in results if r])
                 logger.info(f"Processed {successful} restaurants from page {page}")
                 logger.info(f"Found {len(restaurant_urls)} restaurants, {successful} new entries added")
+            metrics.pages_scraped.inc()
             
-            await asyncio.sleep(random.uniform(1, 2))
\ No newline at end of file
+            await asyncio.sleep(random.uniform(
+                self.config.MIN_DELAY_BETWEEN_PAGES, self.config.MAX_DELAY_BETWEEN_PAGES
+            ))
\ No newline at end of file
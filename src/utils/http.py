@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from typing import Dict, Optional
 import httpx
 import asyncio
@@ -5,6 +6,7 @@ import random
 from loguru import logger
 from fake_useragent import UserAgent
 from src.config.settings import scraper_config
+from src.utils.metrics import metrics
 import socket
 import time
 
@@ -35,55 +37,103 @@ class HttpClient:
         headers["User-Agent"] = self.ua.random
         return headers
 
-    async def _wait_with_exponential_backoff(self, retry_count: int):
+    def _can_retry(self, retry_count: int) -> bool:
+        """Whether another attempt is allowed after the current one."""
+        return retry_count + 1 < self.config.RETRY_ATTEMPTS
+
+    async def _wait_with_exponential_backoff(self, retry_count: int, reason: str):
         """Wait with exponential backoff between retries."""
+        if not self._can_retry(retry_count):
+            return
         wait_time = min(300, (2 ** retry_count) + random.uniform(0, 1))  # Cap at 300 seconds
         logger.warning(f"Waiting {wait_time:.2f} seconds before retry {retry_count + 1}")
+        metrics.http_retries.labels(reason).inc()
+        metrics.http_backoff_seconds.labels(reason).inc(wait_time)
         await asyncio.sleep(wait_time)
 
+    @asynccontextmanager
+    async def _acquire_slot(self):
+        """Hold a concurrency slot, tracking waiting and in-flight requests."""
+        metrics.http_waiting.inc()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            metrics.http_waiting.dec()
+        metrics.http_in_flight.inc()
+        try:
+            yield
+        finally:
+            metrics.http_in_flight.dec()
+            self.semaphore.release()
+
+    async def _fetch(self, url: str) -> httpx.Response:
+        """Send a GET request, recording its latency by response status."""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.client.get(url, headers=self._get_headers())
+            status = str(response.status_code)
+            return response
+        finally:
+            metrics.http_requests.labels(status).inc()
+            metrics.http_fetch_seconds.labels(status).observe(time.perf_counter() - start)
+
     async def get(self, url: str, retry_count: int = 0) -> Optional[str]:
         """Make an HTTP GET request with retry logic and rate limiting."""
         if retry_count >= self.config.RETRY_ATTEMPTS:
             logger.error(f"Max retries exceeded for URL: {url}")
             return None
 
+        retry = False
         try:
-            async with self.semaphore:
+            async with self._acquire_slot():
                 await asyncio.sleep(self.config.DELAY_BETWEEN_REQUESTS)
                 
                 try:
-                    response = await self.client.get(url, headers=self._get_headers())
+                    response = await self._fetch(url)
                     
                     if response.status_code == 200:
                         return response.text
                     elif response.status_code == 429:
-                        retry_after = int(response.headers.get("Retry-After", 60))
-                        logger.warning(f"Rate limited. Waiting {retry_after} seconds...")
-                        await asyncio.sleep(retry_after)
-                        return await self.get(url, retry_count + 1)
+                        if self._can_retry(retry_count):
+                            retry_after = int(response.headers.get("Retry-After", 60))
+                            logger.warning(f"Rate limited. Waiting {retry_after} seconds...")
+                            metrics.http_retries.labels("429").inc()
+                            metrics.http_backoff_seconds.labels("429").inc(retry_after)
+                            await asyncio.sleep(retry_after)
+                        retry = True
                     else:
                         logger.error(f"HTTP {response.status_code} for URL: {url}")
                         if response.status_code in [500, 502, 503, 504]:
-                            await self._wait_with_exponential_backoff(retry_count)
-                            return await self.get(url, retry_count + 1)
-                        return None
+                            await self._wait_with_exponential_backoff(retry_count, str(response.status_code))
+                            retry = True
+                        else:
+                            return None
                 
                 except (httpx.ConnectError, httpx.ConnectTimeout, socket.gaierror) as e:
                     logger.error(f"Connection error for {url}: {str(e)}")
-                    await self._wait_with_exponential_backoff(retry_count)
-                    return await self.get(url, retry_count + 1)
+                    await self._wait_with_exponential_backoff(retry_count, "connection")
+                    retry = True
                 
                 except httpx.TimeoutException as e:
                     logger.error(f"Timeout error for {url}: {str(e)}")
-                    await self._wait_with_exponential_backoff(retry_count)
-                    return await self.get(url, retry_count + 1)
+                    await self._wait_with_exponential_backoff(retry_count, "timeout")
+                    retry = True
                 
                 except Exception as e:
                     logger.error(f"Error fetching {url}: {str(e)}")
-                    await self._wait_with_exponential_backoff(retry_count)
-                    return await self.get(url, retry_count + 1)
+                    await self._wait_with_exponential_backoff(retry_count, "error")
+                    retry = True
+
+            # Retry outside the semaphore so retries never wait on a slot held by their own request
+            if retry:
+                return await self.get(url, retry_count + 1)
 
         except Exception as e:
             logger.error(f"Unexpected error for {url}: {str(e)}")
-            await asyncio.sleep(random.uniform(1, 3))
+            if self._can_retry(retry_count):
+                wait_time = random.uniform(1, 3)
+                metrics.http_retries.labels("unexpected").inc()
+                metrics.http_backoff_seconds.labels("unexpected").inc(wait_time)
+                await asyncio.sleep(wait_time)
             return await self.get(url, retry_count + 1) 
\ No newline at end of file
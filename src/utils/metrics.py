@@ -0,0 +1,377 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+"""
+
+import asyncio
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from loguru import logger
+
+# Limits for requests to the metrics endpoint, so idle or oversized clients can't hold a handler open
+HTTP_REQUEST_TIMEOUT: float = 5.0  # seconds
+HTTP_MAX_HEADER_LINES: int = 100
+HTTP_MAX_LINE_BYTES: int = 8192
+
+# Latency buckets in seconds, from sub-millisecond DB commits to multi-second fetches
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall time spent in the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within the bucket that contains it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """Get the child metric for a set of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _render_samples(self, labels: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(child.value)}"]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for labels, child in sorted(self._children.items()):
+            lines.extend(self._render_samples(labels, child))
+        return lines
+
+    def summary(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} = {_format_value(child.value)}"
+            for labels, child in sorted(self._children.items())
+        ]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_samples(self, labels: Tuple[str, ...], child) -> List[str]:
+        names = self.labelnames + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += bucket_count
+            bucket_labels = _format_labels(names, labels + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{label_text} {child.count}")
+        return lines
+
+    def summary(self) -> List[str]:
+        lines = []
+        for labels, child in sorted(self._children.items()):
+            if not child.count:
+                continue
+            mean_ms = child.sum / child.count * 1000
+            p50, p95, p99 = (child.quantile(q) * 1000 for q in (0.5, 0.95, 0.99))
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)}: count={child.count} "
+                f"total={child.sum:.3f}s mean={mean_ms:.1f}ms p50~{p50:.1f}ms p95~{p95:.1f}ms p99~{p99:.1f}ms"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> List[str]:
+        """Get a human-readable line per recorded series."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.summary())
+        return lines
+
+
+class CrawlMetrics:
+    """Metrics recorded along the crawl pipeline."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+
+        # HTTP
+        self.http_requests = r.counter(
+            "tabelog_http_requests_total", "HTTP fetches by response status", ["status"])
+        self.http_fetch_seconds = r.histogram(
+            "tabelog_http_fetch_seconds", "HTTP fetch latency by response status", ["status"])
+        self.http_retries = r.counter(
+            "tabelog_http_retries_total", "HTTP retries by reason", ["reason"])
+        self.http_backoff_seconds = r.counter(
+            "tabelog_http_backoff_seconds_total", "Time spent waiting before retries", ["reason"])
+        self.http_in_flight = r.gauge(
+            "tabelog_http_in_flight", "Requests currently holding a concurrency slot")
+        self.http_waiting = r.gauge(
+            "tabelog_http_waiting", "Requests waiting for a concurrency slot")
+
+        # Parsing
+        self.parse_seconds = r.histogram(
+            "tabelog_parse_seconds", "Page parse time by page type", ["page_type"])
+
+        # Database
+        self.db_write_seconds = r.histogram(
+            "tabelog_db_write_seconds", "Time spent executing restaurant insert statements")
+        self.db_commit_seconds = r.histogram(
+            "tabelog_db_commit_seconds", "Time spent committing restaurant inserts")
+        self.db_inserts = r.counter(
+            "tabelog_db_inserts_total", "Restaurant inserts by result", ["result"])
+
+        # Pipeline
+        self.pages_scraped = r.counter(
+            "tabelog_listing_pages_total", "Listing pages processed")
+        self.restaurants_pending = r.gauge(
+            "tabelog_restaurants_pending", "Restaurant scrapes queued for the current listing page")
+
+
+metrics = CrawlMetrics()
+
+
+class MetricsExporter:
+    """Periodically write metrics to a Prometheus text file and/or serve them over HTTP."""
+
+    def __init__(self, registry: MetricsRegistry, textfile_path: Optional[str] = None,
+                 interval: float = 15.0, http_host: str = "127.0.0.1", http_port: Optional[int] = None):
+        self.registry = registry
+        self.textfile_path = textfile_path
+        self.interval = interval
+        self.http_host = http_host
+        self.http_port = http_port
+        self._task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Start the periodic writer and the HTTP endpoint if configured."""
+        if self.textfile_path:
+            self.write_textfile()
+            self._task = asyncio.create_task(self._write_periodically())
+            logger.info(f"Writing metrics to {self.textfile_path} every {self.interval:g} seconds")
+        if self.http_port is not None:
+            self._server = await asyncio.start_server(
+                self._handle_http, self.http_host, self.http_port, limit=HTTP_MAX_LINE_BYTES
+            )
+            port = self._server.sockets[0].getsockname()[1]
+            logger.info(f"Serving metrics at http://{self.http_host}:{port}/metrics")
+
+    async def stop(self):
+        """Stop exporting and write the final state of the metrics."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.textfile_path:
+            self.write_textfile()
+
+    def write_textfile(self):
+        """Write the metrics atomically so scrapers never read a partial file."""
+        tmp_path = f"{self.textfile_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(tmp_path, self.textfile_path)
+        except OSError as e:
+            logger.error(f"Error writing metrics file {self.textfile_path}: {str(e)}")
+
+    async def _write_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write_textfile()
+
+    @staticmethod
+    async def _read_request_line(reader: asyncio.StreamReader) -> bytes:
+        """Read the request line and skip a bounded number of header lines."""
+        request_line = await reader.readline()
+        for _ in range(HTTP_MAX_HEADER_LINES):
+            if (await reader.readline()) in (b"\r\n", b"\n", b""):
+                return request_line
+        raise ValueError("too many header lines")
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                request_line = await asyncio.wait_for(self._read_request_line(reader), HTTP_REQUEST_TIMEOUT)
+            except (asyncio.TimeoutError, ValueError) as e:
+                # ValueError also covers lines longer than the stream limit
+                logger.debug("Dropping metrics request: {}", e)
+                return
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"Error serving metrics: {str(e)}")
+        finally:
+            writer.close()
@@ -28,7 +28,7 @@ class TabelogParser:
             json_ld_script = soup.find('script', type='application/ld+json')
             if json_ld_script and json_ld_script.string:
                 data = json.loads(json_ld_script.string)
-                logger.debug(f"Found JSON-LD data: {data}")
+                logger.debug("Found JSON-LD data: {}", data)
                 return data
         except Exception as e:
             logger.error(f"Error extracting JSON-LD data: {str(e)}")
@@ -55,10 +55,10 @@ class TabelogParser:
                                 return None
                             # Clean up the price text
                             price_text = re.sub(r'\s+', ' ', price_text).strip()
-                            logger.debug(f"Found {meal_type} price: {price_text}")
+                            logger.debug("Found {} price: {}", meal_type, price_text)
                             return price_text
 
-            logger.debug(f"No {meal_type} price found in rdheader-budget section")
+            logger.debug("No {} price found in rdheader-budget section", meal_type)
             return None
 
         except Exception as e:
@@ -96,7 +96,10 @@ class TabelogParser:
             if isinstance(geo_data.get('longitude'), (int, float)):
                 longitude = float(geo_data['longitude'])
 
-            logger.debug(f"Extracted location data - Address: {address}, City: {city}, Region: {region}, Coords: ({latitude}, {longitude})")
+            logger.debug(
+                "Extracted location data - Address: {}, City: {}, Region: {}, Coords: ({}, {})",
+                address, city, region, latitude, longitude
+            )
             return address, city, region, latitude, longitude
 
         except Exception as e:
@@ -178,10 +181,14 @@ class TabelogParser:
             }
 
             # Log successful parsing
-            logger.debug(f"Successfully parsed restaurant: {name_en} ({name_jp})")
-            logger.debug(f"Location: {city}, {region} ({latitude}, {longitude})")
-            logger.debug(f"Price ranges - Lunch: {price_lunch or 'Not available'}, Dinner: {price_dinner or 'Not available'}")
-            logger.debug(f"Categories: {', '.join(categories)}")
+            # Arguments are only formatted when DEBUG is enabled
+            logger.debug("Successfully parsed restaurant: {} ({})", name_en, name_jp)
+            logger.debug("Location: {}, {} ({}, {})", city, region, latitude, longitude)
+            logger.debug(
+                "Price ranges - Lunch: {}, Dinner: {}",
+                price_lunch or 'Not available', price_dinner or 'Not available'
+            )
+            logger.opt(lazy=True).debug("Categories: {}", lambda: ', '.join(categories))
             return restaurant_data
 
         except Exception as e:
@@ -195,7 +202,7 @@ class TabelogParser:
             soup = BeautifulSoup(html, 'html.parser')
             restaurant_links = soup.select('a.list-rst__rst-name-target')
             urls = [link['href'] for link in restaurant_links]
-            logger.debug(f"Found {len(urls)} restaurant URLs")
+            logger.debug("Found {} restaurant URLs", len(urls))
             return urls
         except Exception as e:
             logger.error(f"Error extracting URLs: {str(e)}")